@@ -3,26 +3,47 @@ import pandas as pd
 from pathlib import Path
 
 from src.ingest.prizepicks import load_current_offers_valorant as load_current_offers
-from src.ingest.vlr import load_player_maps, load_map_pool
-from src.features.engine import last15_features, head_to_head_over_rate, map_mixture_expectation
+from src.ingest.vlr import load_player_maps_for, load_map_pool
+from src.features.engine import last15_features, head_to_head_over_rate, map_mixture_expectation, index_map_pool, map_pool_row
 
 st.set_page_config(page_title="VALORANT PrizePicks — MVP", layout="centered")
 
-offers = load_current_offers()
-pmap = load_player_maps()
-mpool = load_map_pool()
+# Streamlit reruns the script on every widget interaction; cache the loaders so a
+# rerun is a cache hit instead of a re-fetch/re-parse. Offers move, so short TTL.
+@st.cache_data(ttl=60)
+def cached_offers() -> pd.DataFrame:
+    return load_current_offers()
+
+# Per player: a click only reads the selected player's partition, not the whole table
+@st.cache_data(ttl=3600)
+def cached_player_maps_for(player: str) -> pd.DataFrame:
+    return load_player_maps_for(player)
+
+@st.cache_data(ttl=3600)
+def cached_map_pool() -> pd.DataFrame:
+    return index_map_pool(load_map_pool())
+
+# Keyed by player only: offers for the same player reuse the last-15 summary
+@st.cache_data(ttl=3600)
+def cached_last15(player: str) -> dict:
+    return last15_features(cached_player_maps_for(player), player)
+
+offers = cached_offers()
+mpool = cached_map_pool()
 
 st.title("VALORANT PrizePicks — Bet Card (Demo)")
 
 offer = st.selectbox("Select an offer", offers['offer_id'].tolist())
-off = offers[offers['offer_id']==offer].iloc[0]
+# plain namedtuple for the selected row; .iloc[0] would box every cell into a Series
+off = next(offers[offers['offer_id']==offer].itertuples(index=False))
+
+pmap = cached_player_maps_for(off.player)
 
-st.subheader(f"{off['player']} — {off['stat_type'].title()} line {off['line']} vs {off['opponent']} ({off['team']})")
+st.subheader(f"{off.player} — {off.stat_type.title()} line {off.line} vs {off.opponent} ({off.team})")
 
-l15 = last15_features(pmap, off['player'])
-h2h = head_to_head_over_rate(pmap, off['player'], off['opponent'], float(off['line']))
-mp_row = mpool[(mpool['match_id'] == off['series_id']) & (mpool['team'] == off['team'])]
-mix = map_mixture_expectation(pmap, off['player'], mp_row.squeeze() if not mp_row.empty else pd.Series({}))
+l15 = cached_last15(off.player)
+h2h = head_to_head_over_rate(pmap, off.player, off.opponent, float(off.line))
+mix = map_mixture_expectation(pmap, off.player, map_pool_row(mpool, off.series_id, off.team))
 
 c1, c2 = st.columns(2)
 with c1:
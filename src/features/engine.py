@@ -2,9 +2,101 @@ from __future__ import annotations
 import pandas as pd
 import numpy as np
 
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover
+    njit = None
+
+# Name of the sorted player index built by `index_by_player`. Deliberately not
+# 'player' so the column of the same name stays unambiguous for groupby/merge.
+PLAYER_INDEX = 'player_key'
+
+def index_by_player(player_maps: pd.DataFrame) -> pd.DataFrame:
+    """Sort rows by player and index on it once, so per-player lookups are a slice."""
+    out = player_maps.sort_values('player', kind='stable').set_index('player', drop=False)
+    out.index.name = PLAYER_INDEX
+    return out
+
+def _eq_mask(col: pd.Series, value) -> np.ndarray:
+    # categorical columns compare on integer codes instead of per-row strings
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        try:
+            code = col.cat.categories.get_loc(value)
+        except KeyError:
+            return np.zeros(len(col), dtype=bool)
+        return col.cat.codes.to_numpy() == code
+    return col.values == value
+
+def _player_rows(player_maps: pd.DataFrame, player: str) -> pd.DataFrame:
+    idx = player_maps.index
+    if idx.name == PLAYER_INDEX and idx.is_monotonic_increasing:
+        # binary search on the sorted index; touches only this player's rows
+        if player not in idx:
+            return player_maps.iloc[:0]
+        return player_maps.iloc[idx.slice_indexer(player, player)]
+    return player_maps.loc[_eq_mask(player_maps['player'], player)]
+
+if njit is not None:
+    @njit(cache=True)
+    def _per_map_sums(codes, values, n_codes):
+        # one pass over the player's rows; skips unknown maps (-1) and missing stats
+        sums = np.zeros(n_codes)
+        cnts = np.zeros(n_codes, dtype=np.int64)
+        for i in range(codes.size):
+            c = codes[i]
+            v = values[i]
+            if c < 0 or np.isnan(v):
+                continue
+            sums[c] += v
+            cnts[c] += 1
+        return sums, cnts
+else:
+    def _per_map_sums(codes, values, n_codes):
+        ok = (codes >= 0) & ~np.isnan(values)
+        sums = np.bincount(codes[ok], weights=values[ok], minlength=n_codes)
+        cnts = np.bincount(codes[ok], minlength=n_codes)
+        return sums, cnts
+
+def _per_map_means(player_df: pd.DataFrame, stat: str) -> pd.Series:
+    """Mean of `stat` per map_name (NaN for maps without data), keyed by map name."""
+    names = player_df['map_name']
+    if isinstance(names.dtype, pd.CategoricalDtype):
+        codes, cats = names.cat.codes.to_numpy(), names.cat.categories
+    else:
+        codes, cats = pd.factorize(names)
+    values = pd.to_numeric(player_df[stat], errors='coerce').to_numpy(dtype=np.float64)
+    sums, cnts = _per_map_sums(codes.astype(np.int64), values, len(cats))
+    means = np.full(len(cats), np.nan)
+    np.divide(sums, cnts, out=means, where=cnts > 0)
+    return pd.Series(means, index=cats)
+
+def _most_recent(dfp: pd.DataFrame, n: int) -> pd.DataFrame:
+    # top-n by date without sorting the whole slice; nlargest would drop NaT rows,
+    # so those (and non-datetime dates) keep the full sort
+    dates = dfp['date']
+    if pd.api.types.is_datetime64_any_dtype(dates) and not dates.isna().any():
+        return dfp.nlargest(n, 'date')
+    return dfp.sort_values('date', ascending=False).head(n)
+
+def index_map_pool(map_pool: pd.DataFrame) -> pd.DataFrame:
+    """
+    Map pool keyed by (match_id, team), so a row lookup is a hash get instead of a full scan.
+    Keys are strings, as in `map_mixture_table`, so an int match_id matches a string series_id.
+    """
+    pool = map_pool.assign(match_id=map_pool['match_id'].astype(str), team=map_pool['team'].astype(str))
+    return pool.drop_duplicates(subset=['match_id', 'team']).set_index(['match_id', 'team']).sort_index()
+
+def map_pool_row(pool_idx: pd.DataFrame, match_id, team) -> pd.Series:
+    """Row of an `index_map_pool` frame, or an empty Series when there is none."""
+    if pd.isna(match_id) or pd.isna(team):
+        return pd.Series({}, dtype=float)
+    try:
+        return pool_idx.loc[(str(match_id), str(team))]
+    except KeyError:
+        return pd.Series({}, dtype=float)
+
 def last15_features(player_maps: pd.DataFrame, player: str, stat: str = 'kills') -> dict:
-    dfp = player_maps[player_maps['player'] == player].copy()
-    dfp = dfp.sort_values('date', ascending=False).head(15)
+    dfp = _most_recent(_player_rows(player_maps, player), 15)
     if dfp.empty:
         return {'count': 0, 'mean': np.nan, 'median': np.nan, 'std': np.nan, 'over_rate': np.nan}
     out = {
@@ -16,8 +108,8 @@ def last15_features(player_maps: pd.DataFrame, player: str, stat: str = 'kills')
     return out
 
 def head_to_head_over_rate(player_maps: pd.DataFrame, player: str, opponent: str, line: float, stat: str = 'kills', window: int = 10) -> dict:
-    dfp = player_maps[(player_maps['player'] == player) & (player_maps['opponent'] == opponent)].copy()
-    dfp = dfp.sort_values('date', ascending=False).head(window)
+    dfp = _player_rows(player_maps, player)
+    dfp = _most_recent(dfp[_eq_mask(dfp['opponent'], opponent)], window)
     if dfp.empty:
         return {'h2h_count': 0, 'h2h_over_rate': np.nan}
     over = (dfp[stat] > line).mean()
@@ -25,24 +117,84 @@ def head_to_head_over_rate(player_maps: pd.DataFrame, player: str, opponent: str
 
 def map_mixture_expectation(player_maps: pd.DataFrame, player: str, map_pool_row: pd.Series, stat: str = 'kills') -> dict:
     # crude per-map means * map probabilities
-    results = {}
-    exp_val = 0.0
-    total_p = 0.0
-    for map_name, p in map_pool_row.items():
-        if map_name in ('match_id', 'team'): 
-            continue
-        try:
-            p = float(p)
-        except Exception:
-            continue
-        if p <= 0: 
-            continue
-        m = player_maps[(player_maps['player']==player) & (player_maps['map_name']==map_name)]
-        mu = m[stat].mean() if len(m) else np.nan
-        results[map_name] = {'p': p, 'mu': mu}
-        if not np.isnan(mu):
-            exp_val += p * mu
-            total_p += p
+    # one pass over the player's rows instead of a full-table mask per map
+    player_df = _player_rows(player_maps, player)
+    mu_series = _per_map_means(player_df, stat)
+    p_series = pd.to_numeric(map_pool_row.drop(['match_id', 'team'], errors='ignore'), errors='coerce')
+    p_series = p_series[p_series > 0]
+    mu_series = mu_series.reindex(p_series.index)
+    p_vec = p_series.to_numpy(dtype=np.float64)
+    mu_vec = mu_series.to_numpy(dtype=np.float64)
+    results = {m: {'p': p, 'mu': mu} for m, p, mu in zip(p_series.index, p_vec.tolist(), mu_vec.tolist())}
+    mu_nan = np.isnan(mu_vec)
+    exp_val = float((p_vec[~mu_nan] * mu_vec[~mu_nan]).sum())
+    total_p = float(p_vec[~mu_nan].sum())
     if total_p == 0:
         return {'map_mixture_mu': np.nan, 'per_map': results}
     return {'map_mixture_mu': exp_val, 'per_map': results}
+
+# ------------- batched versions (one pass over all offers) -------------
+# Same numbers as the per-player functions above, for a whole offers table at once.
+
+def last15_table(player_maps: pd.DataFrame, stat: str = 'kills', n: int = 15) -> pd.DataFrame:
+    """Per player: l15_count, l15_mean, l15_median, l15_std over the player's last `n` maps."""
+    recent = player_maps.sort_values('date', ascending=False, kind='stable')
+    recent = recent.groupby('player', observed=True, sort=False).head(n)
+    out = recent.groupby('player', observed=True)[stat].agg(
+        l15_count='size', l15_mean='mean', l15_median='median', l15_std='std')
+    out.loc[out['l15_count'] == 1, 'l15_std'] = 0.0
+    return out.reset_index()
+
+# The inputs below depend only on player maps / map pool. Callers that run the batched
+# tables over several chunks of offers build them once and pass them in.
+
+def h2h_history(player_maps: pd.DataFrame, stat: str = 'kills') -> pd.DataFrame:
+    return player_maps[['player', 'opponent', 'date', stat]].reset_index(drop=True)
+
+def map_means_table(player_maps: pd.DataFrame, stat: str = 'kills') -> pd.DataFrame:
+    """Per (player, map_name): mu, the player's mean `stat` on that map (map_name as str)."""
+    mu = (player_maps.groupby(['player', 'map_name'], observed=True)[stat].mean()
+          .rename('mu').reset_index())
+    mu['map_name'] = mu['map_name'].astype(str)
+    return mu
+
+def map_pool_long(map_pool: pd.DataFrame) -> pd.DataFrame:
+    """Map pool as (match_id, team_key, map_name, p) rows with p > 0; ids as str."""
+    pool = map_pool.drop_duplicates(subset=['match_id', 'team'])
+    pool = pool.melt(id_vars=['match_id', 'team'], var_name='map_name', value_name='p')
+    pool['p'] = pd.to_numeric(pool['p'], errors='coerce')
+    pool = pool[pool['p'] > 0]
+    return pool.assign(match_id=pool['match_id'].astype(str), team=pool['team'].astype(str)) \
+               .rename(columns={'team': 'team_key'})
+
+def head_to_head_table(player_maps: pd.DataFrame, pairs: pd.DataFrame, stat: str = 'kills', window: int = 10,
+                       history: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Per distinct (player, opponent, line) in `pairs`: h2h_count and h2h_over_rate over the last `window` meetings.
+    `history` is `h2h_history(player_maps, stat)` if already built.
+    """
+    pairs = pairs[['player', 'opponent', 'line']].dropna(subset=['player', 'opponent']).drop_duplicates()
+    hist = history if history is not None else h2h_history(player_maps, stat)
+    m = hist.merge(pairs, on=['player', 'opponent'])
+    keys = ['player', 'opponent', 'line']
+    m = m.sort_values('date', ascending=False, kind='stable').groupby(keys, observed=True, sort=False).head(window)
+    m = m.assign(over=m[stat] > m['line'])
+    out = m.groupby(keys, observed=True)['over'].agg(h2h_count='size', h2h_over_rate='mean')
+    return out.reset_index()
+
+def map_mixture_table(player_maps: pd.DataFrame, map_pool: pd.DataFrame, offers: pd.DataFrame, stat: str = 'kills',
+                      means: pd.DataFrame | None = None, pool: pd.DataFrame | None = None) -> pd.DataFrame:
+    """
+    Per distinct (player, series_id, team) in `offers`: map_mix_mu, the sum of P(map) * the
+    player's mean on that map over maps with data, using the map_pool row for (match_id, team).
+    Ids are compared as strings. `means`/`pool` are `map_means_table`/`map_pool_long` if already built.
+    """
+    keys = offers[['player', 'series_id', 'team']].dropna().drop_duplicates()
+    pool = pool if pool is not None else map_pool_long(map_pool)
+    mu = means if means is not None else map_means_table(player_maps, stat)
+    k = keys.assign(match_id=keys['series_id'].astype(str), team_key=keys['team'].astype(str))
+    m = k.merge(pool, on=['match_id', 'team_key'])
+    m = m.merge(mu, on=['player', 'map_name']).dropna(subset=['mu'])
+    m['pmu'] = m['p'] * m['mu']
+    out = m.groupby(['player', 'series_id', 'team'], observed=True)['pmu'].sum().rename('map_mix_mu')
+    return out.reset_index()
@@ -1,11 +1,16 @@
 from __future__ import annotations
-import time
-from typing import Dict, Any, List, Optional
+import time, json
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
 import requests
+import numpy as np
 import pandas as pd
-from datetime import datetime, timezone
 from pathlib import Path
 
+try:  # orjson parses the large `included` arrays several times faster than stdlib json
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
 PP_BASE = "https://api.prizepicks.com"
 # You can set this to None and filter by league name later if IDs shift.
 VALORANT_LEAGUE_IDS = {  # Keep flexible; add/remove as you learn IDs.
@@ -14,6 +19,14 @@ VALORANT_LEAGUE_IDS = {  # Keep flexible; add/remove as you learn IDs.
 # How many records per page; PP often caps around 500.
 PER_PAGE = 500
 TIMEOUT = 15
+# Minimum spacing between requests; we only sleep for whatever is left of it.
+MIN_INTERVAL = 0.8
+MAX_RETRIES = 3
+
+DATA_DIR = Path(__file__).resolve().parents[2] / "data"
+# league id -> name, so we can ask /projections for VALORANT only instead of every league
+LEAGUES_CACHE = DATA_DIR / "raw" / "pp_leagues.json"
+LEAGUES_TTL = 24 * 3600
 
 # Light UA helps some CDNs; do not hammer.
 HEADERS = {
@@ -21,145 +34,262 @@ HEADERS = {
     "User-Agent": "Mozilla/5.0 (educational DS project; contact: youremail@example.com)"
 }
 
-def _get(url: str, params: Dict[str, Any]) -> Dict[str, Any]:
-    r = requests.get(url, params=params, headers=HEADERS, timeout=TIMEOUT)
-    r.raise_for_status()
-    return r.json()
+_last_request_at = 0.0
+# (url, params) -> (ETag, Last-Modified, extracted page) for conditional GETs; a 304 reuses the
+# extracted page. Only the slim form is kept, never the raw JSON.
+_VALIDATED: Dict[Tuple[str, Tuple], Tuple[Optional[str], Optional[str], Any]] = {}
+
+def _throttle() -> None:
+    global _last_request_at
+    elapsed = time.monotonic() - _last_request_at
+    if elapsed < MIN_INTERVAL:
+        time.sleep(MIN_INTERVAL - elapsed)
+    _last_request_at = time.monotonic()
 
-def _paginate(path: str, base_params: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Paginate PrizePicks JSON: returns concatenated `data` arrays."""
-    page = 1
-    out: List[Dict[str, Any]] = []
+def _retry_after(r: requests.Response) -> float:
+    try:
+        return max(0.0, float(r.headers.get("Retry-After", MIN_INTERVAL)))
+    except ValueError:  # HTTP-date form; just back off the default interval
+        return MIN_INTERVAL
+
+def _get(url: str, params: Dict[str, Any], extract: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Any:
+    """
+    GET -> parsed JSON, or `extract(json)` when given. Only extracted responses are
+    revalidated with If-None-Match/If-Modified-Since, since only they are kept.
+    """
+    key = (url, tuple(sorted(params.items())))
+    headers = dict(HEADERS)
+    prev = _VALIDATED.get(key) if extract is not None else None
+    if prev is not None:
+        etag, last_modified, _ = prev
+        if etag: headers["If-None-Match"] = etag
+        if last_modified: headers["If-Modified-Since"] = last_modified
+    for attempt in range(MAX_RETRIES + 1):
+        _throttle()
+        r = requests.get(url, params=params, headers=headers, timeout=TIMEOUT)
+        if r.status_code == 429 and attempt < MAX_RETRIES:
+            time.sleep(_retry_after(r))
+            continue
+        if r.status_code == 304 and prev is not None:
+            return prev[2]
+        r.raise_for_status()
+        payload = orjson.loads(r.content) if orjson is not None else r.json()
+        if extract is None:
+            return payload
+        page = extract(payload)
+        etag, last_modified = r.headers.get("ETag"), r.headers.get("Last-Modified")
+        if etag or last_modified:
+            _VALIDATED[key] = (etag, last_modified, page)
+        else:
+            _VALIDATED.pop(key, None)
+        return page
+
+def _raw_rows(j: Dict[str, Any]) -> int:
+    return len(j.get("data", []))
+
+def _paginate_iter(path: str, base_params: Dict[str, Any], start_page: int = 1,
+                   extract: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                   n_rows: Callable[[Any], int] = _raw_rows) -> Iterator[Any]:
+    """
+    Yield each non-empty page in turn (its JSON, or `extract(json)`), so callers
+    can drop a page once consumed. `n_rows(page)` counts a page's records.
+    """
+    page = start_page
     while True:
         params = dict(base_params)
         params["page"] = page
-        j = _get(f"{PP_BASE}/{path}", params)
-        data = j.get("data", [])
-        if not data:
+        j = _get(f"{PP_BASE}/{path}", params, extract)
+        n = n_rows(j)
+        if not n:
             break
-        out.extend(data)
+        yield j
         # prizepicks pagination style varies; stop if fewer than per_page
-        if len(data) < base_params.get("per_page", PER_PAGE):
+        if n < base_params.get("per_page", PER_PAGE):
             break
         page += 1
-        time.sleep(0.8)  # gentle pause
-    return out
 
-def _index_included(included: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
-    idx = {}
-    for obj in included or []:
-        key = f"{obj.get('type')}:{obj.get('id')}"
-        idx[key] = obj
-    return idx
+def _add_player(obj: Dict[str, Any], names: Dict[str, Any], teams: Dict[str, Any]) -> None:
+    pattr = obj.get("attributes", {})
+    team = pattr.get("team")
+    names[obj.get("id")] = pattr.get("name") or pattr.get("display_name")
+    teams[obj.get("id")] = team.get("abbr") if isinstance(team, dict) else team
 
-def fetch_raw_projections(league_id: Optional[int] = None, single_stat: bool = True) -> Dict[str, Any]:
+def _partition_included(included: List[Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, Any], Dict[str, Any]]:
     """
-    Returns the full JSON (data + included) for projections (all pages).
-    If league_id is None, fetches all leagues; you'll filter by league name downstream.
+    Keep only the fields offers read from `included`, as flat per-field lookups:
+    (league_name_by_id, player_name_by_id, player_team_by_id).
+    `new_players` win over legacy `players` when both carry an id.
     """
-    params = {"per_page": PER_PAGE}
+    league_names: Dict[str, str] = {}
+    player_names: Dict[str, Any] = {}
+    player_teams: Dict[str, Any] = {}
+    legacy = []
+    for obj in included or []:
+        kind = obj.get("type")
+        if kind == "leagues":
+            league_names[obj.get("id")] = obj.get("attributes", {}).get("name", "")
+        elif kind == "new_players":
+            _add_player(obj, player_names, player_teams)
+        elif kind == "players":
+            legacy.append(obj)
+    for obj in legacy:
+        if obj.get("id") not in player_names:
+            _add_player(obj, player_names, player_teams)
+    return league_names, player_names, player_teams
+
+def _projection_params(league_id: Optional[int], single_stat: bool) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"per_page": PER_PAGE}
     if single_stat:
         params["single_stat"] = "true"
     if league_id is not None:
         params["league_id"] = league_id
-    # First page to capture `included`
-    first = _get(f"{PP_BASE}/projections", params)
-    included = first.get("included", [])
-    data = first.get("data", [])
-    # Additional pages
-    more = _paginate("projections", params)
-    if more:
-        data = more  # already includes page 1; we re-used paginate for all
-        # some responses don’t repeat `included` every page; keep the first
+    return params
+
+def fetch_raw_projections(league_id: Optional[int] = None, single_stat: bool = True) -> Dict[str, Any]:
+    """
+    Returns the full JSON (data + included) for projections (all pages).
+    If league_id is None, fetches all leagues; you'll filter by league name downstream.
+    """
+    params = _projection_params(league_id, single_stat)
+    data: List[Dict[str, Any]] = []
+    included: List[Dict[str, Any]] = []
+    # Every page is requested exactly once; page 1's rows are kept like the rest
+    for page in _paginate_iter("projections", params):
+        if not included:
+            # some responses don’t repeat `included` every page; keep the first
+            included = page.get("included", [])
+        data.extend(page["data"])
     return {"data": data, "included": included}
 
-def _is_valorant_league(obj: Dict[str, Any]) -> bool:
-    name = obj.get("attributes", {}).get("name", "").lower()
+def _is_valorant_name(name: str) -> bool:
+    name = (name or "").lower()
     return "valorant" in name or name.strip().upper() in {"VAL", "VALORANT"}
 
+def fetch_leagues(use_cache: bool = True) -> Dict[str, str]:
+    """League id -> name from /leagues, cached on disk for LEAGUES_TTL seconds."""
+    if use_cache and LEAGUES_CACHE.exists() and time.time() - LEAGUES_CACHE.stat().st_mtime < LEAGUES_TTL:
+        return json.loads(LEAGUES_CACHE.read_text(encoding="utf-8"))
+    j = _get(f"{PP_BASE}/leagues", {})
+    leagues = {str(obj.get("id")): obj.get("attributes", {}).get("name", "") for obj in j.get("data", [])}
+    LEAGUES_CACHE.parent.mkdir(parents=True, exist_ok=True)
+    LEAGUES_CACHE.write_text(json.dumps(leagues), encoding="utf-8")
+    return leagues
+
+def _valorant_league_ids() -> List[Any]:
+    """Configured ids if any, else resolved by name from /leagues (empty if that fails)."""
+    if VALORANT_LEAGUE_IDS:
+        return list(VALORANT_LEAGUE_IDS)
+    try:
+        leagues = fetch_leagues()
+    except Exception:
+        return []
+    return [lid for lid, name in leagues.items() if _is_valorant_name(name)]
+
+OFFER_COLUMNS = ["offer_id","player","stat_type","line","team","opponent","series_id","map_scope","offer_time"]
+
+def _col(df: pd.DataFrame, name: str) -> pd.Series:
+    """Flattened column, or all-None when no record had that path."""
+    return df[name] if name in df.columns else pd.Series(None, index=df.index, dtype=object)
+
+def _first_set(df: pd.DataFrame, *names: str) -> pd.Series:
+    """Row-wise `a or b or c` over flattened columns (null/empty string count as unset)."""
+    out = pd.Series(None, index=df.index, dtype=object)
+    for name in names:
+        s = _col(df, name)
+        out = out.where(out.notna() & (out != ""), s)
+    return out.where(out != "")
+
+# Flattened projection fields `_offer_frame` reads; everything else is dropped per page
+RAW_COLUMNS = [
+    "id", "relationships.league.data.id", "relationships.new_player.data.id", "relationships.player.data.id",
+    "relationships.game.data.id", "attributes.stat_type", "attributes.stat_name", "attributes.line_score",
+    "attributes.line", "attributes.value", "attributes.board_time", "attributes.start_time",
+    "attributes.updated_at", "attributes.opponent",
+]
+
+_Lookups = Tuple[Dict[str, str], Dict[str, Any], Dict[str, Any]]
+
+def _slim_page(j: Dict[str, Any]) -> Tuple[pd.DataFrame, _Lookups]:
+    """One projections page as (flattened RAW_COLUMNS rows, `_partition_included` lookups)."""
+    df = pd.json_normalize(j.get("data", []), sep=".")
+    df = df[[c for c in RAW_COLUMNS if c in df.columns]]
+    return df, _partition_included(j.get("included", []))
+
 def _extract_offer_rows(j: Dict[str, Any]) -> pd.DataFrame:
-    data = j.get("data", [])
-    incl = _index_included(j.get("included", []))
-
-    rows = []
-    for d in data:
-        attrs = d.get("attributes", {})
-        rel = d.get("relationships", {})
-
-        # Identify league via relationships -> league -> data -> id
-        league_rel = rel.get("league", {}).get("data")
-        league_ok = True
-        if league_rel:
-            league_obj = incl.get(f"leagues:{league_rel.get('id')}")
-            if league_obj:
-                league_ok = _is_valorant_league(league_obj)
-        # If we specified VALORANT ids elsewhere, you could intersect here.
-
-        if not league_ok:
-            continue
+    return _offer_frame(*_slim_page(j))
+
+def _offer_frame(df: pd.DataFrame, lookups: _Lookups) -> pd.DataFrame:
+    """Offers DF for one page of flattened projections, given `_partition_included` lookups."""
+    if df.empty:
+        return pd.DataFrame()
+    league_names, player_names, player_teams = lookups
+
+    # Identify league via relationships -> league -> data -> id; unknown leagues are kept
+    league_is_val = {lid: _is_valorant_name(name) for lid, name in league_names.items()}
+    league_ok = ~_col(df, "relationships.league.data.id").map(league_is_val).eq(False)
+    df = df[league_ok.to_numpy()]
+    if df.empty:
+        return pd.DataFrame(columns=OFFER_COLUMNS)
+
+    # Player: new_player relationship wins over the legacy one; look up either included type
+    pid = _first_set(df, "relationships.new_player.data.id", "relationships.player.data.id")
+    player_name = pid.map(player_names)
+    team_abbrev = pid.map(player_teams)
 
-        # Player
-        player_id = rel.get("new_player", {}).get("data", {}) or rel.get("player", {}).get("data", {})
-        player_name = None
-        team_abbrev = None
-        if player_id:
-            pobj = incl.get(f"new_players:{player_id.get('id')}") or incl.get(f"players:{player_id.get('id')}")
-            if pobj:
-                pattr = pobj.get("attributes", {})
-                player_name = pattr.get("name") or pattr.get("display_name")
-                team_abbrev = pattr.get("team", {}).get("abbr") if isinstance(pattr.get("team"), dict) else pattr.get("team")
-
-        # Opponent & game
-        opponent = attrs.get("opponent", None)  # sometimes null; PP doesn’t always fill for esports pre-slate
-        game_rel = rel.get("game", {}).get("data", {})
-        series_id = game_rel.get("id")
-
-        # Stat line
-        stat_type = attrs.get("stat_type", attrs.get("stat_name", ""))  # e.g., "kills", "fantasy_score"
-        line = attrs.get("line_score") or attrs.get("line") or attrs.get("value")
-
-        # Timing
-        offer_time = attrs.get("board_time") or attrs.get("start_time") or attrs.get("updated_at")
-        if offer_time:
-            try:
-                offer_time = datetime.fromisoformat(offer_time.replace("Z", "+00:00"))
-            except Exception:
-                offer_time = None
+    # Stat line
+    stat_type = _first_set(df, "attributes.stat_type", "attributes.stat_name")  # e.g., "kills", "fantasy_score"
+    line = pd.to_numeric(_first_set(df, "attributes.line_score", "attributes.line", "attributes.value"), errors="coerce")
 
+    # Timing: board/start/updated times mix ISO shapes (Z vs offset, with or without ms),
+    # so parse each row as ISO 8601 rather than inferring one format from the first
+    offer_time = pd.to_datetime(_first_set(df, "attributes.board_time", "attributes.start_time", "attributes.updated_at"),
+                                errors="coerce", utc=True, format="ISO8601")
+
+    stat_lower = stat_type.astype("string").str.lower()
+    out = pd.DataFrame({
+        "offer_id": _col(df, "id"),
+        "player": player_name,
+        "stat_type": stat_lower,
+        "line": line,
+        "team": team_abbrev,
+        # sometimes null; PP doesn’t always fill for esports pre-slate
+        "opponent": _col(df, "attributes.opponent"),
+        "series_id": _col(df, "relationships.game.data.id"),
         # Map scope ( PrizePicks may distinguish per map vs per match in stat_type names or via markets )
-        map_scope = "per-map" if isinstance(stat_type, str) and "map" in stat_type.lower() else "per-series"
-
-        if player_name and stat_type and line is not None:
-            rows.append({
-                "offer_id": d.get("id"),
-                "player": player_name,
-                "stat_type": str(stat_type).lower(),
-                "line": float(line),
-                "team": team_abbrev,
-                "opponent": opponent,
-                "series_id": series_id,
-                "map_scope": map_scope,
-                "offer_time": offer_time if isinstance(offer_time, datetime) else None,
-            })
-
-    return pd.DataFrame(rows)
+        "map_scope": np.where(stat_lower.str.contains("map", na=False), "per-map", "per-series"),
+        "offer_time": offer_time,
+    })
+    keep = player_name.notna() & (player_name != "") & stat_lower.fillna("").ne("") & line.notna()
+    return out[keep.to_numpy()].reset_index(drop=True)
+
+def iter_offer_frames(league_id: Optional[int] = None, single_stat: bool = True) -> Iterator[pd.DataFrame]:
+    """
+    Offers DF per projections page. Each raw page is released once its rows are
+    extracted, so peak memory is one page of JSON plus the frames built so far.
+    """
+    league_names: Dict[str, str] = {}
+    player_names: Dict[str, Any] = {}
+    player_teams: Dict[str, Any] = {}
+    pages = _paginate_iter("projections", _projection_params(league_id, single_stat),
+                           extract=_slim_page, n_rows=lambda page: len(page[0]))
+    for rows, (ln, pn, pt) in pages:
+        # later pages may omit `included`; keep what earlier pages provided
+        league_names.update(ln); player_names.update(pn); player_teams.update(pt)
+        yield _offer_frame(rows, (league_names, player_names, player_teams))
 
 def load_current_offers_valorant() -> pd.DataFrame:
     """
     Public function: fetch current PrizePicks VALORANT projections -> normalized offers DF.
     """
-    if VALORANT_LEAGUE_IDS:
-        # Try each known league id (collect all)
-        frames = []
-        for lid in VALORANT_LEAGUE_IDS:
-            j = fetch_raw_projections(league_id=lid)
-            frames.append(_extract_offer_rows(j))
-            time.sleep(0.8)
-        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    league_ids = _valorant_league_ids()
+    if league_ids:
+        # Server-side filter: only VALORANT projections come over the wire
+        frames = [f for lid in league_ids for f in iter_offer_frames(league_id=lid)]
     else:
-        # Fetch all and filter by 'valorant' via included league names
-        j = fetch_raw_projections(league_id=None)
-        df = _extract_offer_rows(j)
+        # League lookup unavailable: fetch all and filter by 'valorant' via included league names
+        frames = list(iter_offer_frames(league_id=None))
+    frames = [f for f in frames if not f.empty]
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
     # Basic de-dupe and sort
     if not df.empty:
         df = df.drop_duplicates(subset=["offer_id"]).sort_values("offer_time", na_position="last", ascending=False)
@@ -1,11 +1,33 @@
 from __future__ import annotations
-import os, re, time, json, hashlib, argparse
+import os, re, time, json, hashlib, argparse, threading, shutil, tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from datetime import datetime, timezone
 from typing import Dict, List, Tuple, Optional
+from urllib.parse import urlparse
 
 import requests
 import pandas as pd
-from bs4 import BeautifulSoup
+
+from src.features.engine import index_by_player
+
+# HTML backend: selectolax (lexbor) parses and CSS-selects far faster than bs4;
+# bs4+lxml stays as the fallback when selectolax isn't installed.
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:  # pragma: no cover
+    LexborHTMLParser = None
+    from bs4 import BeautifulSoup
+
+# Optional cache codecs: zstd-compressed bodies and a fast non-crypto URL hash
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+try:
+    import xxhash
+except ImportError:  # pragma: no cover
+    xxhash = None
 
 # Optional normalization helpers
 try:
@@ -14,42 +36,186 @@ except Exception:  # pragma: no cover
     def normalize_offer_fields(**kwargs):
         return kwargs
 
+# Rows within a match repeat team/opponent/map, so normalize each distinct tuple once.
+# Callers only read the returned dict.
+@lru_cache(maxsize=4096)
+def _normalize_memo(player, team, opponent, map_name, agent, stat_type) -> dict:
+    return normalize_offer_fields(player=player, team=team, opponent=opponent,
+                                  map_name=map_name, agent=agent, stat_type=stat_type)
+
+def _normalize_cached(player, team, opponent, map_name, agent, stat_type) -> dict:
+    args = (player, team, opponent, map_name, agent, stat_type)
+    # API payloads can carry dicts/lists (e.g. a team object); those can't key the cache
+    if all(a is None or isinstance(a, str) for a in args):
+        return _normalize_memo(*args)
+    return normalize_offer_fields(player=player, team=team, opponent=opponent,
+                                  map_name=map_name, agent=agent, stat_type=stat_type)
+
 API_BASE = "https://vlrggapi.vercel.app"  # unofficial community API
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Educational DS project; contact: your-email@example.com)"
 }
+# One pooled session for all requests: keep-alive reuses TCP/TLS across matches
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+# Concurrent match fetches in scrape_matches; politeness is enforced by _throttle, not by workers
+MAX_WORKERS = 6
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+PLAYER_MAPS_COLUMNS = [
+    "match_id","map_num","date","player","team","opponent","map_name","agent",
+    "kills","deaths","assists","ACS","rounds_played"
+]
+# Low-cardinality name columns, stored as pandas categoricals (int codes, one copy of each string)
+CATEGORY_COLUMNS = ("player","team","opponent","map_name","agent")
+MAP_POOL_COLUMNS = ["match_id","team","Ascent","Bind","Lotus","Haven","Icebox","Split","Sunset","Breeze"]
+
+# Patterns used per row/cell while scraping; compiled once at import
+_MATCH_ID_RE = re.compile(r"/(\d+)")
+_PICKED_BY_RE = re.compile(r"picked by\s+([A-Za-z0-9\s]+)", flags=re.I)
+_SCORE_RE = re.compile(r"(\b\d{1,2}\b)\s*-\s*(\b\d{1,2}\b)")
+_KDA_RE = re.compile(r"\b\d+\s*/\s*\d+\s*/\s*\d+\b")
+_DIGITS_RE = re.compile(r"\d+")
+_ACS_RE = re.compile(r"^\d{2,3}$")
 
 # ------------- tiny disk cache for scraper -------------
-CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data", "raw", "vlr_cache")
+CACHE_DIR = os.path.join(DATA_DIR, "raw", "vlr_cache")
 os.makedirs(CACHE_DIR, exist_ok=True)
 
-def _cache_path(url: str) -> str:
-    h = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
-    return os.path.join(CACHE_DIR, f"{h}.html")
+# In-process front cache so repeated parses of a URL never touch disk (FIFO-bounded)
+MEM_CACHE_MAX = 256
+_MEM_CACHE: Dict[str, str] = {}
+_mem_lock = threading.Lock()
 
-def fetch_html(url: str, use_cache: bool = True, sleep_sec: float = 0.8) -> str:
+def _cache_path(url: str) -> str:
+    # the hash only names the file; it is not a security boundary
+    if xxhash is not None:
+        h = xxhash.xxh3_64_hexdigest(url)
+    else:
+        h = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    ext = ".html.zst" if zstandard is not None else ".html"
+    return os.path.join(CACHE_DIR, f"{h}{ext}")
+
+# what a truncated or corrupt cache body raises on decode
+_CACHE_READ_ERRORS = (UnicodeDecodeError,) + ((zstandard.ZstdError,) if zstandard is not None else ())
+
+def _read_cached(cp: str) -> Optional[str]:
+    if not os.path.exists(cp):
+        return None
+    with open(cp, "rb") as f:
+        raw = f.read()
+    try:
+        if cp.endswith(".zst"):
+            raw = zstandard.ZstdDecompressor().decompress(raw)
+        return raw.decode("utf-8")
+    except _CACHE_READ_ERRORS:
+        # a body left truncated by an older, non-atomic write: refetch it
+        return None
+
+def _atomic_write(path: str, data: bytes) -> None:
+    """Write via a temp file + os.replace, so readers (and other workers) never see a partial file."""
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+def _write_cached(cp: str, html: str) -> None:
+    raw = html.encode("utf-8")
+    if cp.endswith(".zst"):
+        raw = zstandard.ZstdCompressor(level=3).compress(raw)
+    _atomic_write(cp, raw)
+
+def _remember(url: str, html: str) -> None:
+    with _mem_lock:
+        if url not in _MEM_CACHE and len(_MEM_CACHE) >= MEM_CACHE_MAX:
+            del _MEM_CACHE[next(iter(_MEM_CACHE))]
+        _MEM_CACHE[url] = html
+
+_throttle_lock = threading.Lock()
+# host -> earliest time its next request may start; vlr.gg and the API are spaced independently
+_next_request_at: Dict[str, float] = {}
+
+def _throttle(url: str, min_interval: float) -> None:
+    """Shared across threads: space requests to `url`'s host at least `min_interval` apart."""
+    host = urlparse(url).netloc
+    with _throttle_lock:
+        now = time.monotonic()
+        at = _next_request_at.get(host, 0.0)
+        wait = at - now
+        _next_request_at[host] = max(now, at) + min_interval
+    if wait > 0:
+        time.sleep(wait)
+
+def _validators_path(cp: str) -> str:
+    return f"{cp}.json"
+
+def _conditional_headers(cp: str) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since from the validators saved next to a cached body."""
+    vp = _validators_path(cp)
+    if not os.path.exists(vp):
+        return {}
+    try:
+        with open(vp, "r", encoding="utf-8") as f:
+            v = json.load(f)
+    except ValueError:  # unreadable sidecar: send an unconditional GET
+        return {}
+    headers = {}
+    if v.get("etag"): headers["If-None-Match"] = v["etag"]
+    if v.get("last_modified"): headers["If-Modified-Since"] = v["last_modified"]
+    return headers
+
+def _write_validators(cp: str, r: requests.Response) -> None:
+    v = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified")}
+    if v["etag"] or v["last_modified"]:
+        _atomic_write(_validators_path(cp), json.dumps(v).encode("utf-8"))
+
+def fetch_html(url: str, use_cache: bool = True, sleep_sec: float = 0.8, revalidate: bool = False) -> str:
+    """
+    Cached GET. A cached body is returned without touching the network unless
+    `revalidate` is set, in which case a conditional GET is sent and a 304 keeps
+    the cached body (no transfer, no re-parse of a changed page).
+    """
     cp = _cache_path(url)
-    if use_cache and os.path.exists(cp):
-        with open(cp, "r", encoding="utf-8") as f:
-            return f.read()
-    time.sleep(sleep_sec)
-    r = requests.get(url, headers=HEADERS, timeout=20)
+    cached = None
+    if use_cache:
+        cached = _MEM_CACHE.get(url)
+        if cached is None:
+            cached = _read_cached(cp)
+            if cached is not None:
+                _remember(url, cached)
+        if cached is not None and not revalidate:
+            return cached
+    headers = _conditional_headers(cp) if cached is not None else {}
+    _throttle(url, sleep_sec)
+    r = SESSION.get(url, headers=headers, timeout=20)
+    if r.status_code == 304 and cached is not None:
+        return cached
     r.raise_for_status()
     html = r.text
     if use_cache:
-        with open(cp, "w", encoding="utf-8") as f:
-            f.write(html)
+        _write_cached(cp, html)
+        _write_validators(cp, r)
+        _remember(url, html)
     return html
 
 # ------------- API helpers (best-effort) -------------
-def _api_get(path: str, params: Optional[dict] = None) -> dict:
+def _api_get(path: str, params: Optional[dict] = None, sleep_sec: float = 0.8) -> dict:
     url = f"{API_BASE.rstrip('/')}/{path.lstrip('/')}"
-    r = requests.get(url, params=params or {}, headers=HEADERS, timeout=15)
+    # the pool's workers share the API host's spacing, so they don't burst it
+    _throttle(url, sleep_sec)
+    r = SESSION.get(url, params=params or {}, timeout=15)
     r.raise_for_status()
     return r.json()
 
 def _extract_match_id_from_url(url_or_id: str) -> str:
-    m = re.search(r"/(\d+)", url_or_id)
+    m = _MATCH_ID_RE.search(url_or_id)
     return m.group(1) if m else url_or_id.strip()
 
 def api_fetch_match(match_id: str) -> Tuple[dict, pd.DataFrame, pd.DataFrame, List[dict]]:
@@ -100,10 +266,7 @@ def api_fetch_match(match_id: str) -> Tuple[dict, pd.DataFrame, pd.DataFrame, Li
 
     # Maps & per-map stats (if provided)
     maps_df = pd.DataFrame(columns=["match_id","map_num","map_name","winner","score","picked_by","first_pick_order"])
-    pmaps_df = pd.DataFrame(columns=[
-        "match_id","map_num","date","player","team","opponent","map_name","agent",
-        "kills","deaths","assists","ACS","rounds_played"
-    ])
+    pmaps_rows: List[dict] = []
     vetoes_list: List[dict] = []
 
     # API may expose a `maps` array with basic info
@@ -124,15 +287,15 @@ def api_fetch_match(match_id: str) -> Tuple[dict, pd.DataFrame, pd.DataFrame, Li
             for side in ("team1_players", "team2_players", "players"):
                 players = mobj.get(side) or []
                 for prow in players:
-                    pa = normalize_offer_fields(
-                        player = prow.get("name") or prow.get("player"),
-                        team   = prow.get("team"),
-                        opponent = meta["team_b"] if (prow.get("team") == meta["team_a"]) else meta["team_a"],
-                        map_name = mobj.get("map") or mobj.get("name"),
-                        agent  = prow.get("agent"),
-                        stat_type = "kills",
+                    pa = _normalize_cached(
+                        prow.get("name") or prow.get("player"),
+                        prow.get("team"),
+                        meta["team_b"] if (prow.get("team") == meta["team_a"]) else meta["team_a"],
+                        mobj.get("map") or mobj.get("name"),
+                        prow.get("agent"),
+                        "kills",
                     )
-                    pmaps_df = pd.concat([pmaps_df, pd.DataFrame([{
+                    pmaps_rows.append({
                         "match_id": match_id,
                         "map_num": i,
                         "date": meta["date"],
@@ -146,8 +309,10 @@ def api_fetch_match(match_id: str) -> Tuple[dict, pd.DataFrame, pd.DataFrame, Li
                         "assists": prow.get("assists"),
                         "ACS": prow.get("acs"),
                         "rounds_played": prow.get("rounds"),
-                    }])], ignore_index=True)
+                    })
         maps_df = pd.DataFrame(rows)
+    # build once from plain rows; appending via pd.concat per row copies the frame each time
+    pmaps_df = pd.DataFrame(pmaps_rows, columns=PLAYER_MAPS_COLUMNS)
 
     # Vetoes / notes if provided
     vetoes = meta_raw.get("vetoes") or meta_raw.get("notes") or []
@@ -161,108 +326,164 @@ def api_fetch_match(match_id: str) -> Tuple[dict, pd.DataFrame, pd.DataFrame, Li
     return meta, maps_df, pmaps_df, vetoes_list
 
 # ------------- Scraper fallback (HTML) -------------
-def _parse_match_header(soup: BeautifulSoup) -> Dict[str, Optional[str]]:
+# Thin node helpers so the parsers below run on either backend
+# (selectolax: .css/.css_first/.text/.attributes; bs4: .select/.select_one/.get_text/.get).
+def _html_tree(html: str):
+    if LexborHTMLParser is not None:
+        return LexborHTMLParser(html)
+    return BeautifulSoup(html, "lxml")
+
+def _css(node, selector: str) -> list:
+    return node.css(selector) if LexborHTMLParser is not None else node.select(selector)
+
+def _css_first(node, selector: str):
+    return node.css_first(selector) if LexborHTMLParser is not None else node.select_one(selector)
+
+def _text(node, sep: str = "") -> str:
+    if LexborHTMLParser is not None:
+        return node.text(separator=sep, strip=True)
+    return node.get_text(sep, strip=True)
+
+def _attr(node, name: str) -> Optional[str]:
+    return node.attributes.get(name) if LexborHTMLParser is not None else node.get(name)
+
+def _has_class(node, cls: str) -> bool:
+    return cls in (node.attributes.get("class") or "").split()
+
+def _find_previous_div(node, cls: str):
+    """Nearest `div.<cls>` before `node` in document order (bs4's find_previous)."""
+    if LexborHTMLParser is None:
+        return node.find_previous("div", class_=cls)
+    cur = node
+    while cur is not None:
+        sib = cur.prev
+        while sib is not None:
+            # a sibling's descendants come after the sibling itself, so check them first
+            inner = sib.css(f"div.{cls}")
+            if inner:
+                return inner[-1]
+            if sib.tag == "div" and _has_class(sib, cls):
+                return sib
+            sib = sib.prev
+        cur = cur.parent
+        if cur is not None and cur.tag == "div" and _has_class(cur, cls):
+            return cur
+    return None
+
+def _first_in(nodes: list, selector: str):
+    """First match of `selector` inside `nodes`, in document order (usually found in the first cell or two)."""
+    for node in nodes:
+        hit = _css_first(node, selector)
+        if hit is not None:
+            return hit
+    return None
+
+def _parse_match_header(tree) -> Dict[str, Optional[str]]:
     out = {"team_a": None, "team_b": None, "event": None, "bo_format": None, "date": None}
-    teams = soup.select("div.match-header .match-header-link .wf-title-med")
+    teams = _css(tree, "div.match-header .match-header-link .wf-title-med")
     if len(teams) >= 2:
-        out["team_a"] = teams[0].get_text(strip=True)
-        out["team_b"] = teams[1].get_text(strip=True)
-    ev = soup.select_one(".match-header .match-header-event a")
-    if ev: out["event"] = ev.get_text(strip=True)
-    bo = soup.select_one(".match-header .match-header-vs-note")
-    if bo: out["bo_format"] = bo.get_text(strip=True)
-    dt_node = soup.select_one(".match-header .moment-tz-convert")
-    if dt_node and dt_node.has_attr("data-epoch"):
+        out["team_a"] = _text(teams[0])
+        out["team_b"] = _text(teams[1])
+    ev = _css_first(tree, ".match-header .match-header-event a")
+    if ev: out["event"] = _text(ev)
+    bo = _css_first(tree, ".match-header .match-header-vs-note")
+    if bo: out["bo_format"] = _text(bo)
+    dt_node = _css_first(tree, ".match-header .moment-tz-convert")
+    epoch = _attr(dt_node, "data-epoch") if dt_node else None
+    if epoch:
         try:
-            ts = int(dt_node["data-epoch"])
+            ts = int(epoch)
             out["date"] = datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
         except Exception:
             pass
     if not out["date"]:
-        dt_txt = soup.select_one(".match-header .match-header-date")
-        if dt_txt: out["date"] = dt_txt.get_text(" ", strip=True)
+        dt_txt = _css_first(tree, ".match-header .match-header-date")
+        if dt_txt: out["date"] = _text(dt_txt, " ")
     return out
 
-def _parse_vetoes(soup: BeautifulSoup) -> List[Dict[str, str]]:
+def _parse_vetoes(tree) -> List[Dict[str, str]]:
     out = []
-    sections = soup.select(".match-veto-box, .match-header-note")
+    sections = _css(tree, ".match-veto-box, .match-header-note")
     for sec in sections:
-        text = sec.get_text(" ", strip=True)
+        text = _text(sec, " ")
         if any(k in text.lower() for k in ["ban", "pick", "decider"]):
             out.append({"note": text})
     return out
 
-def _parse_maps_and_players(soup: BeautifulSoup, team_a: str, team_b: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+def _parse_maps_and_players(tree, team_a: str, team_b: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
     map_rows: List[Dict] = []
     player_rows: List[Dict] = []
 
-    maps = soup.select(".vm-stats-game")
+    maps = _css(tree, ".vm-stats-game")
     map_num = 0
     for m in maps:
         map_num += 1
         map_name = None
-        name_el = m.select_one(".map")
+        name_el = _css_first(m, ".map")
         if name_el:
-            map_name = name_el.get_text(strip=True)
+            map_name = _text(name_el)
 
         picked_by = None
-        pick_el = m.select_one(".mod-picked, .picked, .note")
+        pick_el = _css_first(m, ".mod-picked, .picked, .note")
         if pick_el:
-            txt = pick_el.get_text(" ", strip=True)
-            mm = re.search(r"picked by\s+([A-Za-z0-9\s]+)", txt, flags=re.I)
+            txt = _text(pick_el, " ")
+            mm = _PICKED_BY_RE.search(txt)
             if mm: picked_by = mm.group(1).strip()
 
-        header_txt = m.get_text(" ", strip=True)
+        header_txt = _text(m, " ")
         score = None; winner = None
-        ms = re.search(r"(\b\d{1,2}\b)\s*-\s*(\b\d{1,2}\b)", header_txt)
+        ms = _SCORE_RE.search(header_txt)
         if ms:
             s_a, s_b = int(ms.group(1)), int(ms.group(2))
             score = f"{s_a}-{s_b}"
             winner = team_a if s_a > s_b else team_b
 
         # Player tables (2 per map typically)
-        tables = m.select(".vm-stats-game .wf-table-inset, .vm-stats-game .wf-table")
+        tables = _css(m, ".vm-stats-game .wf-table-inset, .vm-stats-game .wf-table")
         if not tables:
-            tables = m.select(".wf-table-inset, .wf-table")
+            tables = _css(m, ".wf-table-inset, .wf-table")
         team_i = 0
         for tbl in tables:
             team_i += 1
-            heading = tbl.find_previous("div", class_="vm-stats-game-header")
+            heading = _find_previous_div(tbl, "vm-stats-game-header")
             team_name = None
             if heading:
-                bits = heading.get_text(" ", strip=True)
+                bits = _text(heading, " ")
                 if team_a and team_a.lower() in bits.lower(): team_name = team_a
                 elif team_b and team_b.lower() in bits.lower(): team_name = team_b
             if not team_name:
                 team_name = team_a if team_i == 1 else team_b
 
-            trs = tbl.select("tr")
+            trs = _css(tbl, "tr")
             for tr in trs:
-                cols = [td.get_text(" ", strip=True) for td in tr.select("td")]
-                if len(cols) < 3: continue
-                player = tr.select_one("td a, td span")
-                player_name = player.get_text(strip=True) if player else cols[0]
+                # select the cells once; everything else is looked up inside them
+                tds = _css(tr, "td")
+                if len(tds) < 3: continue
+                cols = [_text(td, " ") for td in tds]
+                player = _first_in(tds, "a, span")
+                player_name = _text(player) if player else cols[0]
                 agent = None
-                img = tr.select_one("img")
-                if img and img.has_attr("alt"):
-                    agent = img["alt"].strip()
+                img = _first_in(tds, "img")
+                alt = _attr(img, "alt") if img else None
+                if alt is not None:
+                    agent = alt.strip()
                 kda = None
                 for c in cols:
-                    if re.search(r"\b\d+\s*/\s*\d+\s*/\s*\d+\b", c):
+                    if _KDA_RE.search(c):
                         kda = c; break
                 kills = deaths = assists = None
                 if kda:
-                    k, d, a = re.findall(r"\d+", kda)[:3]
+                    k, d, a = _DIGITS_RE.findall(kda)[:3]
                     kills, deaths, assists = int(k), int(d), int(a)
                 acs = None
                 for c in cols:
-                    if re.match(r"^\d{2,3}$", c):
+                    if _ACS_RE.match(c):
                         acs = int(c); break
 
-                pa = normalize_offer_fields(
-                    player=player_name, team=team_name,
-                    opponent=(team_b if team_name == team_a else team_a),
-                    map_name=map_name, agent=agent, stat_type="kills"
+                pa = _normalize_cached(
+                    player_name, team_name,
+                    (team_b if team_name == team_a else team_a),
+                    map_name, agent, "kills"
                 )
                 player_rows.append({
                     "match_id": None,
@@ -286,13 +507,13 @@ def _parse_maps_and_players(soup: BeautifulSoup, team_a: str, team_b: str) -> Tu
     df_pmaps = pd.DataFrame(player_rows)
     return df_maps, df_pmaps
 
-def scrape_match(match_url: str) -> Tuple[dict, pd.DataFrame, pd.DataFrame, List[dict]]:
-    html = fetch_html(match_url)
-    soup = BeautifulSoup(html, "lxml")
-    meta = _parse_match_header(soup)
+def scrape_match(match_url: str, revalidate: bool = False) -> Tuple[dict, pd.DataFrame, pd.DataFrame, List[dict]]:
+    html = fetch_html(match_url, revalidate=revalidate)
+    tree = _html_tree(html)
+    meta = _parse_match_header(tree)
     team_a, team_b = meta.get("team_a") or "", meta.get("team_b") or ""
-    df_maps, df_pmaps = _parse_maps_and_players(soup, team_a, team_b)
-    vetoes = _parse_vetoes(soup)
+    df_maps, df_pmaps = _parse_maps_and_players(tree, team_a, team_b)
+    vetoes = _parse_vetoes(tree)
     match_id = _extract_match_id_from_url(match_url)
     for df in (df_maps, df_pmaps):
         if not df.empty: df["match_id"] = match_id
@@ -300,9 +521,10 @@ def scrape_match(match_url: str) -> Tuple[dict, pd.DataFrame, pd.DataFrame, List
     return meta, df_maps, df_pmaps, vetoes
 
 # ------------- Public API (with adapter) -------------
-def parse_match(match_url_or_id: str) -> Tuple[dict, pd.DataFrame, pd.DataFrame, List[dict]]:
+def parse_match(match_url_or_id: str, revalidate: bool = False) -> Tuple[dict, pd.DataFrame, pd.DataFrame, List[dict]]:
     """
     API-first: try vlrggapi by match_id; if incomplete -> scrape vlr.gg page.
+    `revalidate` re-checks a cached page with a conditional GET before reusing it.
     """
     match_id = _extract_match_id_from_url(match_url_or_id)
     # Try API
@@ -312,7 +534,7 @@ def parse_match(match_url_or_id: str) -> Tuple[dict, pd.DataFrame, pd.DataFrame,
         if maps_df.empty or pmaps_df.empty:
             # Try to scrape for richer granularity if a full URL was provided
             if match_url_or_id.startswith("http"):
-                meta_s, maps_s, pmaps_s, vetoes_s = scrape_match(match_url_or_id)
+                meta_s, maps_s, pmaps_s, vetoes_s = scrape_match(match_url_or_id, revalidate=revalidate)
                 # Merge: fill blanks from scraper
                 if maps_df.empty: maps_df = maps_s
                 if pmaps_df.empty: pmaps_df = pmaps_s
@@ -328,20 +550,29 @@ def parse_match(match_url_or_id: str) -> Tuple[dict, pd.DataFrame, pd.DataFrame,
             match_url = f"https://www.vlr.gg/{match_id}/match"
         else:
             match_url = match_url_or_id
-        return scrape_match(match_url)
+        return scrape_match(match_url, revalidate=revalidate)
 
-def scrape_matches(match_urls: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+def scrape_matches(match_urls: List[str], revalidate: bool = False) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """
     Given match URLs (or ids), return (matches_df, maps_df, player_maps_df).
-    Uses API-first per match with scraper fallback.
+    Uses API-first per match with scraper fallback; matches are fetched on a
+    small thread pool and results are kept in input order.
     """
+    results: List[Optional[tuple]] = [None] * len(match_urls)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(parse_match, u, revalidate): i for i, u in enumerate(match_urls)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                results[i] = fut.result()
+            except Exception as e:
+                print(f"[WARN] Failed to parse {match_urls[i]}: {e}")
+
     matches_meta, all_maps, all_pmaps = [], [], []
-    for u in match_urls:
-        try:
-            meta, df_maps, df_pmaps, vetoes = parse_match(u)
-        except Exception as e:
-            print(f"[WARN] Failed to parse {u}: {e}")
+    for u, res in zip(match_urls, results):
+        if res is None:
             continue
+        meta, df_maps, df_pmaps, vetoes = res
         match_id = _extract_match_id_from_url(u)
         matches_meta.append({
             "match_id": match_id,
@@ -360,29 +591,129 @@ def scrape_matches(match_urls: List[str]) -> Tuple[pd.DataFrame, pd.DataFrame, p
     maps_df = pd.concat(all_maps, ignore_index=True) if all_maps else pd.DataFrame(
         columns=["match_id","map_num","map_name","winner","score","picked_by","first_pick_order"]
     )
-    player_maps_df = pd.concat(all_pmaps, ignore_index=True) if all_pmaps else pd.DataFrame(
-        columns=["match_id","map_num","date","player","team","opponent","map_name","agent","kills","deaths","assists","ACS","rounds_played"]
-    )
-    return matches_df, maps_df, player_maps_df
+    player_maps_df = pd.concat(all_pmaps, ignore_index=True) if all_pmaps else pd.DataFrame(columns=PLAYER_MAPS_COLUMNS)
+    return matches_df, maps_df, _with_categories(player_maps_df)
+
+# ------------- Local data loaders -------------
+def _with_categories(df: pd.DataFrame) -> pd.DataFrame:
+    for c in CATEGORY_COLUMNS:
+        if c in df.columns:
+            df[c] = df[c].astype("category")
+    return df
+
+def _mtime(path: str) -> float:
+    return os.path.getmtime(path) if os.path.exists(path) else float("-inf")
+
+def _read_csv_table(csv_path: str) -> pd.DataFrame:
+    df = pd.read_csv(csv_path)
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"], errors="coerce", utc=True)
+    return df
+
+def _read_table(name: str, columns: List[str]) -> pd.DataFrame:
+    """
+    Read data/<name>: the Parquet copy (typed columns, no date reparsing) unless the
+    CSV is newer or the only file, so replacing a CSV always takes effect.
+    Missing files give an empty frame with the expected schema. Never writes;
+    see `write_parquet_copies` for creating/refreshing the Parquet copies.
+    """
+    pq_path = os.path.join(DATA_DIR, f"{name}.parquet")
+    csv_path = os.path.join(DATA_DIR, f"{name}.csv")
+    if os.path.exists(pq_path) and _mtime(pq_path) >= _mtime(csv_path):
+        return pd.read_parquet(pq_path)
+    if os.path.exists(csv_path):
+        return _read_csv_table(csv_path)
+    return pd.DataFrame(columns=columns)
+
+def write_parquet_copies(names: Tuple[str, ...] = ("sample_player_maps", "sample_map_pool")) -> List[str]:
+    """(Re)write data/<name>.parquet from each CSV that is newer than its copy; returns the paths written."""
+    written = []
+    for name in names:
+        pq_path = os.path.join(DATA_DIR, f"{name}.parquet")
+        csv_path = os.path.join(DATA_DIR, f"{name}.csv")
+        if os.path.exists(csv_path) and _mtime(csv_path) > _mtime(pq_path):
+            _read_csv_table(csv_path).to_parquet(pq_path, index=False)
+            written.append(pq_path)
+    return written
 
-# Back-compat stubs (so other parts of the project don't break)
 def load_player_maps() -> pd.DataFrame:
-    return pd.DataFrame(
-        columns=["match_id","map_num","date","player","team","opponent","map_name","agent","kills","deaths","assists","ACS","rounds_played"]
-    )
+    """Player-map rows indexed by player (see `index_by_player`) for fast feature lookups."""
+    df = _with_categories(_read_table("sample_player_maps", PLAYER_MAPS_COLUMNS))
+    return index_by_player(df)
+
+# Hive-style copy of player maps (player=<name>/...) so one player's rows can be read alone
+PLAYER_MAPS_BY_PLAYER_DIR = os.path.join(DATA_DIR, "sample_player_maps_by_player")
+
+def _player_partitions_fresh() -> bool:
+    src = max(_mtime(os.path.join(DATA_DIR, f"sample_player_maps.{ext}")) for ext in ("parquet", "csv"))
+    return os.path.isdir(PLAYER_MAPS_BY_PLAYER_DIR) and _mtime(PLAYER_MAPS_BY_PLAYER_DIR) >= src
+
+def write_player_partitions(df: pd.DataFrame) -> None:
+    """
+    Replace the player-partitioned copy with `df`. The copy is written to a temp dir and
+    swapped in, so pyarrow never appends files next to an old copy (duplicate rows) and
+    concurrent builders can't interleave; if another builder wins the swap, ours is dropped.
+    """
+    tmp = tempfile.mkdtemp(prefix=".by_player-", dir=DATA_DIR)
+    try:
+        df.reset_index(drop=True).to_parquet(tmp, partition_cols=["player"], index=False)
+        old = None
+        if os.path.isdir(PLAYER_MAPS_BY_PLAYER_DIR):
+            old = f"{tmp}.old"
+            os.replace(PLAYER_MAPS_BY_PLAYER_DIR, old)
+        try:
+            os.replace(tmp, PLAYER_MAPS_BY_PLAYER_DIR)
+        except OSError:  # another builder's copy landed first; keep that one
+            pass
+        if old:
+            shutil.rmtree(old, ignore_errors=True)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def load_player_maps_for(player: str) -> pd.DataFrame:
+    """
+    Only `player`'s rows, read from the player-partitioned Parquet copy so other
+    players' rows never leave disk. When that copy is missing, older than the source
+    table or unreadable, load everything once, rebuild the copy (best effort) and slice.
+    """
+    if _player_partitions_fresh():
+        try:
+            df = pd.read_parquet(PLAYER_MAPS_BY_PLAYER_DIR, filters=[("player", "=", player)])
+            return index_by_player(_with_categories(df))
+        except Exception:  # unreadable/partial copy; rebuild from the full table
+            pass
+    df = load_player_maps()
+    if not df.empty:
+        try:
+            write_player_partitions(df)
+        except Exception:  # no parquet engine installed, or lost a rename race
+            pass
+    return df[(df["player"] == player).to_numpy()]
 
 def load_map_pool() -> pd.DataFrame:
-    return pd.DataFrame(columns=["match_id","team","Ascent","Bind","Lotus","Haven","Icebox","Split","Sunset","Breeze"])
+    return _read_table("sample_map_pool", MAP_POOL_COLUMNS)
 
 # ------------- CLI -------------
 def _cli():
     ap = argparse.ArgumentParser(description="VLR ingest (API-first with scraper fallback)")
     ap.add_argument("--match", help="VLR match URL or numeric id", default=None)
     ap.add_argument("--batch", nargs="+", help="Space-separated list of match URLs/ids", default=None)
+    ap.add_argument("--to-parquet", action="store_true",
+                    help="Write/refresh data/*.parquet copies of the sample CSVs (faster local loads)")
+    ap.add_argument("--revalidate", action="store_true",
+                    help="Re-check cached match pages with a conditional GET instead of reusing them as is")
     args = ap.parse_args()
 
+    if args.to_parquet:
+        written = write_parquet_copies()
+        if written or not _player_partitions_fresh():
+            write_player_partitions(load_player_maps())
+            written.append(PLAYER_MAPS_BY_PLAYER_DIR)
+        print("\n".join(written) if written else "Parquet copies already up to date.")
+        return
+
     if args.match:
-        meta, df_maps, df_pmaps, vetoes = parse_match(args.match)
+        meta, df_maps, df_pmaps, vetoes = parse_match(args.match, revalidate=args.revalidate)
         print("META:", json.dumps(meta, indent=2, ensure_ascii=False))
         print("\nMAPS:\n", (df_maps.to_string(index=False) if not df_maps.empty else "<empty>"))
         print("\nPLAYER MAPS:\n", (df_pmaps.head(30).to_string(index=False) if not df_pmaps.empty else "<empty>"))
@@ -390,7 +721,7 @@ def _cli():
         return
 
     if args.batch:
-        matches_df, maps_df, pmaps_df = scrape_matches(args.batch)
+        matches_df, maps_df, pmaps_df = scrape_matches(args.batch, revalidate=args.revalidate)
         print("MATCHES:\n", (matches_df.to_string(index=False) if not matches_df.empty else "<empty>"))
         print("\nMAPS:\n", (maps_df.head(30).to_string(index=False) if not maps_df.empty else "<empty>"))
         print("\nPLAYER MAPS:\n", (pmaps_df.head(30).to_string(index=False) if not pmaps_df.empty else "<empty>"))
@@ -1,63 +1,218 @@
 from __future__ import annotations
+import hashlib, json
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import brier_score_loss, log_loss
 from pathlib import Path
 
-from src.ingest.prizepicks import load_current_offers
+try:  # serializes the coef ndarrays directly, no .tolist() pass
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+from src.ingest.prizepicks import load_current_offers_valorant as load_current_offers
 from src.ingest.vlr import load_player_maps, load_map_pool
-from src.features.engine import last15_features, head_to_head_over_rate, map_mixture_expectation
+from src.features.engine import (last15_table, head_to_head_table, map_mixture_table,
+                                 h2h_history, map_means_table, map_pool_long)
 
 DATA_DIR = Path(__file__).resolve().parents[2] / "data"
 SILVER_DIR = DATA_DIR / "silver"
 SILVER_DIR.mkdir(parents=True, exist_ok=True)
 
-def build_training_frame() -> pd.DataFrame:
-    offers = load_current_offers()
-    pmap = load_player_maps()
-    mpool = load_map_pool()
-    rows = []
-    for _, off in offers.iterrows():
-        player = off['player']
-        opponent = off['opponent']
-        line = float(off['line'])
-        # last-15
-        l15 = last15_features(pmap, player)
-        # h2h (against opponent in sample set)
-        h2h = head_to_head_over_rate(pmap, player, opponent, line)
-        # map mixture using player's team row from mpool (if any)
-        mp_row = mpool[(mpool['match_id'] == off['series_id']) & (mpool['team'] == off['team'])]
-        mix = map_mixture_expectation(pmap, player, mp_row.squeeze() if not mp_row.empty else pd.Series({}))
-        rows.append({
-            'player': player,
-            'opponent': opponent,
-            'line': line,
-            'l15_mean': l15['mean'],
-            'l15_std': l15['std'],
-            'h2h_over_rate': h2h['h2h_over_rate'],
-            'map_mix_mu': mix.get('map_mixture_mu', np.nan),
-            # label: in demo, synthesize with l15_mean vs line (do NOT do this in real life)
-            'y_over': 1 if (pd.notna(l15['mean']) and l15['mean'] > line) else 0
-        })
-    return pd.DataFrame(rows)
+FEATURE_COLUMNS = ['l15_mean', 'l15_std', 'map_mix_mu']
+TRAINING_COLUMNS = ['player', 'opponent', 'line', 'l15_mean', 'l15_std', 'h2h_over_rate', 'map_mix_mu', 'y_over']
+
+def _lookup(table: pd.DataFrame, keys: list, value: str, frame: pd.DataFrame) -> np.ndarray:
+    """`table[value]` for each row of `frame`, matched on `keys` (NaN where missing), as float64."""
+    col = table.set_index(keys)[value]
+    idx = pd.MultiIndex.from_frame(frame[keys]) if len(keys) > 1 else pd.Index(frame[keys[0]])
+    return col.reindex(idx).to_numpy(dtype=np.float64)
+
+# Inputs the feature frame is derived from, besides the offers themselves
+SOURCE_TABLES = ("sample_player_maps", "sample_map_pool")
+# Bump when feature engineering changes, so cached frames from older code are not reused
+FEATURES_VERSION = 1
+
+def _fingerprint(offers: pd.DataFrame) -> str:
+    """Changes whenever the offers' feature keys, the local source files or FEATURES_VERSION change."""
+    h = hashlib.blake2b(digest_size=8)
+    h.update(f"v{FEATURES_VERSION}".encode())
+    keys = offers[['player', 'opponent', 'line', 'series_id', 'team']]
+    h.update(pd.util.hash_pandas_object(keys, index=False).to_numpy().tobytes())
+    for name in SOURCE_TABLES:
+        for ext in ("parquet", "csv"):
+            fp = DATA_DIR / f"{name}.{ext}"
+            if fp.exists():
+                st = fp.stat()
+                h.update(f"{fp.name}:{st.st_mtime_ns}:{st.st_size}".encode())
+    return h.hexdigest()
+
+def build_training_frame(use_cache: bool = True) -> pd.DataFrame:
+    """
+    Offers + engineered features + demo label. The result is cached in the silver
+    layer under a fingerprint of its inputs, so a retrain on unchanged data skips
+    feature engineering.
+    """
+    # the offers fetch is network-bound; read the local tables while it is in flight
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        f_offers = pool.submit(load_current_offers)
+        f_pmap = pool.submit(load_player_maps)
+        f_mpool = pool.submit(load_map_pool)
+        offers, pmap, mpool = f_offers.result(), f_pmap.result(), f_mpool.result()
+    if offers.empty:
+        return pd.DataFrame(columns=TRAINING_COLUMNS)
+    # fingerprint only once every loader is done, so no source file is stat'ed mid-write
+    cache = SILVER_DIR / f"features_{_fingerprint(offers)}.parquet"
+    if use_cache and cache.exists():
+        return pd.read_parquet(cache)
+    df = _feature_frame(offers, pmap, mpool)
+    if use_cache:
+        try:
+            df.to_parquet(cache, index=False)
+        except ImportError:  # no parquet engine; just don't cache
+            pass
+        else:
+            # older fingerprints can never match again; drop them so silver/ doesn't grow per run
+            for stale in SILVER_DIR.glob("features_*.parquet"):
+                if stale != cache:
+                    stale.unlink(missing_ok=True)
+    return df
+
+# Offers per feature-engineering chunk; bounds the size of the h2h/map-pool joins
+CHUNK_ROWS = 10_000
+
+# Name columns joined between offers and player maps
+KEY_CATEGORIES = ('player', 'opponent', 'team')
+
+def _shared_categories(offers: pd.DataFrame, pmap: pd.DataFrame):
+    """
+    Recode the key columns of both frames to one categorical dtype per column, so
+    groupbys and merges run on integer codes. With differing dtypes (or object on one
+    side) pandas would fall back to hashing the strings.
+    """
+    offers, pmap = offers.copy(), pmap.copy()
+    for c in KEY_CATEGORIES:
+        names = pd.concat([pmap[c].astype(object), offers[c].astype(object)], ignore_index=True)
+        dtype = pd.CategoricalDtype(names.dropna().unique())
+        offers[c] = offers[c].astype(dtype)
+        pmap[c] = pmap[c].astype(dtype)
+    return offers, pmap
+
+def _feature_frame(offers: pd.DataFrame, pmap: pd.DataFrame, mpool: pd.DataFrame,
+                   chunk_rows: int = CHUNK_ROWS) -> pd.DataFrame:
+    offers, pmap = _shared_categories(offers, pmap)
+    # everything that depends only on player maps / map pool is built once for all chunks
+    shared = {
+        'l15': last15_table(pmap),
+        'history': h2h_history(pmap),
+        'means': map_means_table(pmap),
+        'pool': map_pool_long(mpool),
+    }
+    parts = [_chunk_features(offers.iloc[i:i + chunk_rows], shared)
+             for i in range(0, len(offers), chunk_rows)]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=TRAINING_COLUMNS)
+
+def _chunk_features(offers: pd.DataFrame, shared: dict) -> pd.DataFrame:
+    offers = offers.assign(line=offers['line'].astype(float))
+    # features for every offer in the chunk at once (one groupby per feature), then each
+    # column is a typed array aligned to the offers; the frame is built once from those arrays
+    # last-15
+    l15_mean = _lookup(shared['l15'], ['player'], 'l15_mean', offers)
+    l15_std = _lookup(shared['l15'], ['player'], 'l15_std', offers)
+    # h2h (against opponent in sample set)
+    h2h = head_to_head_table(None, offers, history=shared['history'])
+    h2h_over_rate = _lookup(h2h, ['player', 'opponent', 'line'], 'h2h_over_rate', offers)
+    # map mixture using player's team row from mpool (if any)
+    mix = map_mixture_table(None, None, offers, means=shared['means'], pool=shared['pool'])
+    map_mix_mu = _lookup(mix, ['player', 'series_id', 'team'], 'map_mix_mu', offers)
+    line = offers['line'].to_numpy(dtype=np.float64)
+    # label: in demo, synthesize with l15_mean vs line (do NOT do this in real life);
+    # a NaN mean compares False, so players without history label 0 with no branch.
+    # Compared in float64, before the downcast below could round a mean onto the line.
+    y_over = np.greater(l15_mean, line).astype(np.int8)
+    # stored features are float32: half the memory/Parquet size, ample precision for these stats
+    return pd.DataFrame({
+        'player': offers['player'].to_numpy(dtype=object),
+        'opponent': offers['opponent'].to_numpy(dtype=object),
+        'line': line.astype(np.float32),
+        'l15_mean': l15_mean.astype(np.float32),
+        'l15_std': l15_std.astype(np.float32),
+        'h2h_over_rate': h2h_over_rate.astype(np.float32),
+        'map_mix_mu': map_mix_mu.astype(np.float32),
+        'y_over': y_over,
+    }, copy=False)
+
+MODEL_PATH = SILVER_DIR / "baseline_model.json"
+# Below this many rows liblinear converges fastest; above it saga, warm-started from the last fit
+SMALL_FIT_ROWS = 1000
+
+def _make_model(n_rows: int, n_features: int):
+    if n_rows < SMALL_FIT_ROWS:
+        # liblinear ignores warm_start, so nothing to load
+        return LogisticRegression(solver='liblinear', max_iter=1000, tol=1e-4)
+    # saga only converges quickly on standardized features (l15_mean is ~15-20),
+    # so it fits behind a scaler; saved coefficients are in that scaled space
+    lr = LogisticRegression(solver='saga', max_iter=1000, tol=1e-4, warm_start=True)
+    model = make_pipeline(StandardScaler(), lr)
+    # start from the previous scaled run's coefficients when they fit this feature set
+    try:
+        prev = json.loads(MODEL_PATH.read_text())
+        coef = np.asarray(prev['coef'], dtype=np.float64)
+        intercept = np.asarray(prev['intercept'], dtype=np.float64)
+        scaled = prev.get('scaler_mean') is not None
+    except (OSError, ValueError, KeyError):
+        return model
+    if scaled and coef.shape == (1, n_features) and intercept.shape == (1,):
+        lr.coef_, lr.intercept_ = coef, intercept
+    return model
+
+def _model_blob(model) -> dict:
+    """coef/intercept of the fitted classifier, plus the scaler's mean/scale when it has one (else None)."""
+    if isinstance(model, Pipeline):
+        scaler, lr = model[0], model[-1]
+        scaler_mean, scaler_scale = scaler.mean_, scaler.scale_
+    else:
+        lr, scaler_mean, scaler_scale = model, None, None
+    arrays = {'coef': lr.coef_, 'intercept': lr.intercept_, 'scaler_mean': scaler_mean, 'scaler_scale': scaler_scale}
+    if orjson is not None:
+        # orjson's numpy path needs C-contiguous arrays; liblinear's coef_ is a column slice
+        return {k: (None if v is None else np.ascontiguousarray(v)) for k, v in arrays.items()}
+    return {k: (None if v is None else v.tolist()) for k, v in arrays.items()}
 
 def train_baseline():
     df = build_training_frame().dropna(subset=['l15_mean','line'])
     if len(df) < 2:
         print("Not enough data to train. Add more sample rows.")
         return
-    X = df[['l15_mean','l15_std','map_mix_mu']].fillna(df[['l15_mean','l15_std','map_mix_mu']].mean())
-    y = df['y_over'].astype(int)
-    model = LogisticRegression(max_iter=1000).fit(X, y)
+    # impute NaNs with column means: one slice, one nanmean, filled in place
+    X = df[FEATURE_COLUMNS].to_numpy(dtype=np.float32, copy=True)
+    means = np.nan_to_num(np.nanmean(X, axis=0))  # all-NaN column: nothing to fill from, use 0
+    nan_r, nan_c = np.nonzero(np.isnan(X))
+    X[nan_r, nan_c] = means[nan_c]
+    # liblinear and the scaler+saga pipeline accept C-contiguous float32 as is, so check_array won't copy X;
+    # 0/1 labels fit in int8
+    y = df['y_over'].to_numpy(dtype=np.int8)
+    model = _make_model(*X.shape).fit(X, y)
     # crude eval on the same data (for demo only)
     p = model.predict_proba(X)[:,1]
     print("LogLoss:", log_loss(y, p))
     print("Brier:", brier_score_loss(y, p))
-    out = {'coef': model.coef_.tolist(), 'intercept': model.intercept_.tolist()}
-    (SILVER_DIR / "baseline_model.json").write_text(json.dumps(out, indent=2))
-    (SILVER_DIR / "training_frame.csv").write_text(df.to_csv(index=False))
-    print("Saved model to", SILVER_DIR / "baseline_model.json")
+    out = _model_blob(model)
+    if orjson is not None:
+        MODEL_PATH.write_bytes(orjson.dumps(out, option=orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        MODEL_PATH.write_text(json.dumps(out, separators=(',', ':')))
+    # pandas writes straight to the file; no whole-CSV string in memory
+    df.to_csv(SILVER_DIR / "training_frame.csv", index=False)
+    try:
+        df.to_parquet(SILVER_DIR / "training_frame.parquet", engine="pyarrow", compression="zstd", index=False)
+    except ImportError:  # pyarrow not installed; the CSV is still written
+        pass
+    print("Saved model to", MODEL_PATH)
 
 if __name__ == "__main__":
     train_baseline()
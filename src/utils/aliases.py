@@ -1,6 +1,12 @@
-from typing import Dict
+import sys
+from types import MappingProxyType
+from typing import Dict, Mapping
 
-TEAM_ALIASES: Dict[str, str] = {
+def _interned(d: Dict[str, str]) -> Dict[str, str]:
+    # interned keys/values: lookups with interned names compare by identity first
+    return {sys.intern(k): sys.intern(v) for k, v in d.items()}
+
+_TEAM: Dict[str, str] = _interned({
     "SEN": "Sentinels",
     "NRG": "NRG",
     "FNC": "Fnatic",
@@ -8,9 +14,17 @@ TEAM_ALIASES: Dict[str, str] = {
     "PRX": "Paper Rex",
     "EG": "Evil Geniuses",
     "100T": "100 Thieves",
-}
+})
 
-PLAYER_ALIASES: Dict[str, str] = {
+_PLAYER: Dict[str, str] = _interned({
     "TenZ": "TenZ",
     "Derke": "Derke",
-}
+})
+
+# Read-only views; mutate the alias tables above, not these.
+TEAM_ALIASES: Mapping[str, str] = MappingProxyType(_TEAM)
+PLAYER_ALIASES: Mapping[str, str] = MappingProxyType(_PLAYER)
+
+# Bound lookups for hot paths: resolve_team(x, x) instead of TEAM_ALIASES.get(x, x)
+resolve_team = _TEAM.get
+resolve_player = _PLAYER.get